@@ -10,44 +10,69 @@ Endpoints:
   POST /approve/{id}    — Manager approval callback (resume suspended workflow)
 
 Environment variables:
-  PROGRESS_TABLE        — DynamoDB table name for progress tracking
-  LOAN_FUNCTION_NAME    — ARN of the loan durable Lambda (alias)
+  PROGRESS_TABLE            — DynamoDB table name for progress tracking
+  LOAN_FUNCTION_NAME        — ARN of the loan durable Lambda (alias)
+  POWERTOOLS_TRACE_METHODS  — "1" to add an X-Ray subsegment per route handler
 """
 
 import json
 import os
-import random
-import string
+import secrets
 import time
+import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
-from functools import partial
 
 import boto3
+import orjson
 from aws_lambda_powertools import Logger, Metrics, Tracer
-from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
+from aws_lambda_powertools.event_handler import (
+    APIGatewayHttpResolver,
+    Response,
+    content_types,
+)
 from aws_lambda_powertools.event_handler.exceptions import (
     BadRequestError,
     NotFoundError,
 )
 from aws_lambda_powertools.logging import correlation_paths
 from aws_lambda_powertools.metrics import MetricUnit
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import BotoCoreError, ClientError
 
 
 logger = Logger()
 tracer = Tracer()
 metrics = Metrics()
 
+# Method-level subsegments are opt-in: the handlers are thin pass-throughs to
+# boto3 calls that are already traced, so by default only the Lambda handler
+# gets a segment
+TRACE_METHODS = os.environ.get("POWERTOOLS_TRACE_METHODS", "0") == "1"
+trace_method = tracer.capture_method if TRACE_METHODS else (lambda func: func)
+
+
+def _decimal_default(obj):
+    """Encode Decimal values (as returned by DynamoDB) as float for orjson."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 
-class DecimalEncoder(json.JSONEncoder):
-    """Encode Decimal values as float for JSON serialization."""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super().default(obj)
+def _serialize(obj):
+    return orjson.dumps(obj, default=_decimal_default).decode()
 
 
-app = APIGatewayHttpResolver(serializer=partial(json.dumps, cls=DecimalEncoder))
+def _json_response(payload, status_code=200):
+    """Return payload serialized once here, so the resolver passes it through as-is."""
+    return Response(
+        status_code=status_code,
+        content_type=content_types.APPLICATION_JSON,
+        body=_serialize(payload),
+    )
+
+
+app = APIGatewayHttpResolver(serializer=_serialize)
 
 dynamodb = boto3.resource("dynamodb")
 lambda_client = boto3.client("lambda")
@@ -55,6 +80,36 @@ lambda_client = boto3.client("lambda")
 PROGRESS_TABLE = os.environ["PROGRESS_TABLE"]
 LOAN_FUNCTION_NAME = os.environ["LOAN_FUNCTION_NAME"]
 
+# Table layout: one META row per application plus one LOG#<timestamp>#<uuid>
+# row per log entry (see loan_demo.py)
+META_SK = "META"
+LOG_SK_PREFIX = "LOG#"
+
+# Application IDs are LOAN-<epoch seconds>-<4 hex chars>; new IDs are redrawn
+# this many times on a collision
+APPLICATION_ID_ATTEMPTS = 3
+
+# Callback errors that may succeed on a later approval; anything else means
+# the callback is gone for good (timed out, unknown ID, bad input)
+CALLBACK_RETRYABLE_ERROR_CODES = {"TooManyRequestsException", "ServiceException"}
+
+# Rows expire via DynamoDB TTL (the "ttl" attribute) after this many days
+PROGRESS_TTL_DAYS = 30
+
+# Built once per execution environment and reused by warm invocations
+progress_table = dynamodb.Table(PROGRESS_TABLE)
+
+
+def _warm_clients():
+    """Load the DynamoDB service model and open a connection during Lambda init."""
+    try:
+        progress_table.meta.client.describe_table(TableName=PROGRESS_TABLE)
+    except Exception as exc:
+        logger.debug("Client warm-up skipped", error=str(exc))
+
+
+_warm_clients()
+
 
 @app.exception_handler(json.JSONDecodeError)
 def handle_json_decode_error(exc):
@@ -63,7 +118,7 @@ def handle_json_decode_error(exc):
 
 
 @app.post("/apply")
-@tracer.capture_method
+@trace_method
 def apply():
     """POST /apply — Submit a new loan application."""
     body = app.current_event.json_body
@@ -82,29 +137,53 @@ def apply():
     except (ValueError, TypeError):
         raise BadRequestError("loan_amount must be a number")
 
-    # Generate application ID
-    random_suffix = "".join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    application_id = f"LOAN-{int(time.time())}-{random_suffix}"
-
     timestamp = datetime.now(timezone.utc).isoformat()
-
-    # Create initial DynamoDB record
-    table = dynamodb.Table(PROGRESS_TABLE)
-    table.put_item(Item={
-        "application_id": application_id,
-        "status": "submitted",
-        "current_step": "submitted",
-        "applicant_name": name,
-        "loan_amount": Decimal(str(loan_amount)),
-        "logs": [{
-            "timestamp": timestamp,
-            "step": "submitted",
-            "message": "Application received",
-            "level": "info",
-        }],
-        "result": None,
-        "created_at": timestamp,
-    })
+    expires_at = int(time.time()) + PROGRESS_TTL_DAYS * 86400
+
+    # Generate application ID and create its META record plus first log
+    # entry in one transaction. The META put is conditional so a same-second
+    # ID collision can never overwrite another application; on a collision a
+    # fresh suffix is drawn.
+    for attempt in range(APPLICATION_ID_ATTEMPTS):
+        random_suffix = secrets.token_hex(2).upper()
+        application_id = f"LOAN-{int(time.time())}-{random_suffix}"
+        try:
+            # The resource's client marshals plain Python values, like Table
+            dynamodb.meta.client.transact_write_items(TransactItems=[
+                {"Put": {
+                    "TableName": PROGRESS_TABLE,
+                    "Item": {
+                        "application_id": application_id,
+                        "sk": META_SK,
+                        "status": "submitted",
+                        "current_step": "submitted",
+                        "applicant_name": name,
+                        "loan_amount": Decimal(str(loan_amount)),
+                        "result": None,
+                        "created_at": timestamp,
+                        "ttl": expires_at,
+                    },
+                    "ConditionExpression": "attribute_not_exists(application_id)",
+                }},
+                {"Put": {
+                    "TableName": PROGRESS_TABLE,
+                    "Item": {
+                        "application_id": application_id,
+                        "sk": f"{LOG_SK_PREFIX}{timestamp}#{uuid.uuid4().hex}",
+                        "timestamp": timestamp,
+                        "step": "submitted",
+                        "message": "Application received",
+                        "level": "info",
+                        "ttl": expires_at,
+                    },
+                }},
+            ])
+            break
+        except ClientError as exc:
+            reasons = exc.response.get("CancellationReasons", [])
+            collided = reasons and reasons[0].get("Code") == "ConditionalCheckFailed"
+            if not collided or attempt == APPLICATION_ID_ATTEMPTS - 1:
+                raise
 
     # Build workflow event payload
     workflow_event = {
@@ -116,40 +195,64 @@ def apply():
         "loan_purpose": "personal_loan",
         "address": address,
         "phone": phone,
+        # Let the workflow's logs be tied back to this API request
+        "_correlation_id": app.current_event.request_context.request_id,
     }
 
-    # Invoke loan workflow Lambda asynchronously
+    # Invoke loan workflow Lambda asynchronously. This stays a direct async
+    # invoke rather than an SQS hand-off: an event source mapping invokes
+    # synchronously, tying the message to the whole (up to 30 minute)
+    # durable execution, including the manager approval wait.
     lambda_client.invoke(
         FunctionName=LOAN_FUNCTION_NAME,
         InvocationType="Event",
-        Payload=json.dumps(workflow_event),
+        Payload=orjson.dumps(workflow_event),
     )
 
     logger.info("Application created and workflow invoked", application_id=application_id)
     metrics.add_metric(name="ApplicationsSubmitted", unit=MetricUnit.Count, value=1)
 
-    return {"application_id": application_id}
+    return _json_response({"application_id": application_id})
 
 
 @app.get("/status/<applicationId>")
-@tracer.capture_method
+@trace_method
 def status(applicationId: str):
     """GET /status/{applicationId} — Return current progress."""
     if not applicationId:
         raise BadRequestError("Missing applicationId")
 
-    table = dynamodb.Table(PROGRESS_TABLE)
-    result = table.get_item(Key={"application_id": applicationId})
+    # One query returns the META row plus every LOG# row for the application
+    query_kwargs = {"KeyConditionExpression": Key("application_id").eq(applicationId)}
+    item = None
+    logs = []
+    while True:
+        result = progress_table.query(**query_kwargs)
+        for row in result["Items"]:
+            sk = row.pop("sk")
+            row.pop("application_id")
+            row.pop("ttl", None)
+            # Replay bookkeeping stays internal to the workflow
+            if sk == META_SK:
+                row.pop("last_seq", None)
+                item = row
+            else:
+                row.pop("seq", None)
+                logs.append(row)
+        if "LastEvaluatedKey" not in result:
+            break
+        query_kwargs["ExclusiveStartKey"] = result["LastEvaluatedKey"]
 
-    item = result.get("Item")
     if not item:
         raise NotFoundError("Application not found")
 
-    return item
+    item["application_id"] = applicationId
+    item["logs"] = logs
+    return _json_response(item)
 
 
 @app.post("/approve/<applicationId>")
-@tracer.capture_method
+@trace_method
 def approve(applicationId: str):
     """POST /approve/{applicationId} — Manager approval sends callback to resume workflow."""
     if not applicationId:
@@ -158,17 +261,21 @@ def approve(applicationId: str):
     body = app.current_event.json_body
     approved = body.get("approved", False)
 
-    # Read callback_id from DynamoDB (stored by the workflow's setup step)
-    table = dynamodb.Table(PROGRESS_TABLE)
-    result = table.get_item(Key={"application_id": applicationId})
-    item = result.get("Item")
-
-    if not item:
-        raise NotFoundError("Application not found")
-
-    callback_id = item.get("callback_id")
-    if not callback_id:
-        raise BadRequestError("No pending approval for this application")
+    # Claim the callback_id stored by the workflow and clear it in the same
+    # write, so two concurrent approvals cannot both resume the execution
+    try:
+        result = progress_table.update_item(
+            Key={"application_id": applicationId, "sk": META_SK},
+            UpdateExpression="REMOVE callback_id",
+            ConditionExpression="attribute_exists(callback_id)",
+            ReturnValues="ALL_OLD",
+        )
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            raise BadRequestError("No pending approval for this application")
+        raise
+
+    callback_id = result["Attributes"]["callback_id"]
 
     # Send callback to resume the suspended durable execution
     callback_result = {
@@ -177,21 +284,30 @@ def approve(applicationId: str):
     if not approved:
         callback_result["reason"] = body.get("reason", "Manager denied the application")
 
-    lambda_client.send_durable_execution_callback_success(
-        CallbackId=callback_id,
-        Result=json.dumps(callback_result),
-    )
-
-    # Clear the callback_id from DynamoDB
-    table.update_item(
-        Key={"application_id": applicationId},
-        UpdateExpression="REMOVE callback_id",
-    )
+    try:
+        lambda_client.send_durable_execution_callback_success(
+            CallbackId=callback_id,
+            Result=orjson.dumps(callback_result).decode(),
+        )
+    except (ClientError, BotoCoreError) as exc:
+        if isinstance(exc, ClientError) and exc.response["Error"]["Code"] not in CALLBACK_RETRYABLE_ERROR_CODES:
+            raise
+        # Throttling, service or network error: put the callback_id back so
+        # the approval can be retried
+        try:
+            progress_table.update_item(
+                Key={"application_id": applicationId, "sk": META_SK},
+                UpdateExpression="SET callback_id = :cid",
+                ExpressionAttributeValues={":cid": callback_id},
+            )
+        except (ClientError, BotoCoreError):
+            logger.exception("Could not restore callback_id", application_id=applicationId)
+        raise
 
     logger.info("Approval sent", application_id=applicationId, approved=approved)
     metrics.add_metric(name="ApprovalsProcessed", unit=MetricUnit.Count, value=1)
 
-    return {"status": "approval_sent", "approved": approved}
+    return _json_response({"status": "approval_sent", "approved": approved})
 
 
 @tracer.capture_lambda_handler
@@ -3,38 +3,52 @@ External Fraud Check Service — Callback Simulator
 ==================================================
 
 Simulates an external fraud-check API. The demo durable workflow
-invokes this Lambda asynchronously, passing a callback_id.
-After a short delay (simulating processing), this function calls
-SendDurableExecutionCallbackSuccess to resume the suspended workflow.
+sends a request to the fraud check SQS queue, passing a callback_id.
+This Lambda consumes the queue and, after a short delay (simulating
+processing), calls SendDurableExecutionCallbackSuccess to resume the
+suspended workflow.
 
 This demonstrates the callback pattern: the durable execution suspends
 with zero compute cost while an external system does work, then
 resumes when the callback arrives.
 """
 
-import json
 import os
 import time
 
 import boto3
+import orjson
 from aws_lambda_powertools import Logger, Tracer
+from botocore.exceptions import ClientError
 
 
 logger = Logger()
 tracer = Tracer()
 
+TRACE_METHODS = os.environ.get("POWERTOOLS_TRACE_METHODS", "0") == "1"
+trace_method = tracer.capture_method if TRACE_METHODS else (lambda func: func)
+
 lambda_client = boto3.client("lambda")
 
 WORKFLOW_FUNCTION_NAME = os.environ["WORKFLOW_FUNCTION_NAME"]
+DEMO_MODE = os.environ.get("DEMO_MODE") == "1"
 
+# Errors meaning the callback has timed out or no longer exists (e.g. it was
+# already completed). SQS may deliver a request more than once, so these are
+# not worth retrying.
+CALLBACK_RESOLVED_ERROR_CODES = {
+    "CallbackTimeoutException",
+    "ResourceNotFoundException",
+}
 
-@tracer.capture_lambda_handler
-@logger.inject_lambda_context(log_event=True)
-def lambda_handler(event, context):
+
+@trace_method
+def process_fraud_check(request):
     """Simulate fraud check processing, then send callback to resume workflow."""
-    callback_id = event["callback_id"]
-    applicant_name = event.get("applicant_name", "Unknown")
-    application_id = event.get("application_id", "Unknown")
+    callback_id = request["callback_id"]
+    applicant_name = request.get("applicant_name", "Unknown")
+    application_id = request.get("application_id", "Unknown")
+    logger.append_keys(correlation_id=request.get("correlation_id"))
 
     logger.info(
         "Fraud check started",
@@ -43,8 +57,9 @@ def lambda_handler(event, context):
         callback_id=callback_id,
     )
 
-    # Simulate external processing time
-    time.sleep(5)
+    # Simulate external processing time (demo deployments only)
+    if DEMO_MODE:
+        time.sleep(5)
 
     result = {
         "fraud_check": "passed",
@@ -59,13 +74,39 @@ def lambda_handler(event, context):
     )
 
     # Resume the suspended durable execution
-    lambda_client.send_durable_execution_callback_success(
-        CallbackId=callback_id,
-        Result=json.dumps(result),
-    )
+    try:
+        lambda_client.send_durable_execution_callback_success(
+            CallbackId=callback_id,
+            Result=orjson.dumps(result).decode(),
+        )
+    except ClientError as exc:
+        error_code = exc.response["Error"]["Code"]
+        if error_code not in CALLBACK_RESOLVED_ERROR_CODES:
+            raise
+        logger.warning(
+            "Callback already resolved — dropping duplicate fraud check request",
+            application_id=application_id,
+            callback_id=callback_id,
+            error_code=error_code,
+        )
+        return {
+            "status": "callback_already_resolved",
+            "callback_id": callback_id,
+            "application_id": application_id,
+        }
 
     return {
         "status": "callback_sent",
         "callback_id": callback_id,
         "application_id": application_id,
     }
+
+
+@tracer.capture_lambda_handler
+@logger.inject_lambda_context(log_event=True)
+def lambda_handler(event, context):
+    """Process fraud check requests delivered by the SQS event source mapping."""
+    return [
+        process_fraud_check(orjson.loads(record["body"]))
+        for record in event["Records"]
+    ]
@@ -5,9 +5,11 @@ Loan Durable Workflow — Frontend Presentation
 Durable loan approval workflow designed for live demos with a React frontend.
 
 Features:
-  - Writes progress to DynamoDB at each step (frontend polls for updates)
+  - Writes progress to DynamoDB (frontend polls for updates), one item per
+    log entry, batched and flushed at each step boundary and on exit
   - Hardcoded scenarios based on SIN last 4 digits for predictable outcomes
-  - Deliberate time.sleep() in each step to visualize progress
+  - Deliberate time.sleep() in each step to visualize progress (DEMO_MODE=1
+    only, so sleeps are not billed outside demos)
   - External fraud check via callback (separate Lambda sends callback to resume)
   - Manager approval callback for loans >= $100K
 
@@ -18,14 +20,19 @@ Hardcoded scenarios:
 """
 
 import hashlib
-import json
+import itertools
 import os
+import random
 import time
+import uuid
+import zlib
 from datetime import datetime, timezone
 from decimal import Decimal
 
 import boto3
+import orjson
 from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
 
 from aws_durable_execution_sdk_python import (
     DurableContext,
@@ -41,64 +48,300 @@ from aws_durable_execution_sdk_python.config import (
 
 logger = Logger()
 
+DEMO_MODE = os.environ.get("DEMO_MODE") == "1"
+
+# Progress writes use the low-level client with pre-marshalled AttributeValues,
+# skipping the resource layer's per-call type serialization
+dynamodb_client = boto3.client("dynamodb")
+sqs_client = boto3.client("sqs")
+
 
 # ─────────────────────────────────────────────────
 # DynamoDB Progress Logging
 # ─────────────────────────────────────────────────
 
-def get_progress_table():
-    dynamodb = boto3.resource("dynamodb")
-    return dynamodb.Table(os.environ["PROGRESS_TABLE"])
+# Progress table layout: one META row per application (status, result,
+# callback_id) plus one LOG#<timestamp>#<uuid> row per log entry.
+META_SK = "META"
+LOG_SK_PREFIX = "LOG#"
+BATCH_WRITE_LIMIT = 25
+BATCH_WRITE_MAX_ATTEMPTS = 5
+BATCH_WRITE_BASE_DELAY = 0.05   # seconds, doubled on each retry
+TRANSACT_WRITE_LIMIT = 100      # META update + log puts per transaction
 
+# Matches api.py: rows expire via DynamoDB TTL (the "ttl" attribute)
+PROGRESS_TTL_DAYS = 30
+
+
+def _to_attribute_value(value):
+    """Marshal a Python value into a low-level DynamoDB AttributeValue.
+
+    Scalars return without descending; floats are written straight to their
+    string form, so step results need no separate float-to-Decimal pass.
+    """
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float, Decimal)):
+        return {"N": str(value)}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, dict):
+        return {"M": {k: _to_attribute_value(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [_to_attribute_value(v) for v in value]}
+    raise TypeError(f"Unsupported type for DynamoDB: {type(value).__name__}")
+
+
+def _warm_clients():
+    """Load the DynamoDB service model and open a connection during Lambda init.
+
+    Init-phase work is kept out of the first request's latency. A failure
+    here is harmless: the first real call simply pays the cost instead.
+    """
+    try:
+        dynamodb_client.describe_table(TableName=os.environ["PROGRESS_TABLE"])
+    except Exception as exc:
+        logger.debug("Client warm-up skipped", error=str(exc))
+
+
+_warm_clients()
 
-def log_progress(table, application_id, step, message, status, level="info", result=None):
-    """Append a log entry and update status in DynamoDB."""
-    timestamp = datetime.now(timezone.utc).isoformat()
-    log_entry = {
-        "timestamp": timestamp,
-        "step": step,
-        "message": message,
-        "level": level,
-    }
 
-    update_expr = (
-        "SET #logs = list_append(if_not_exists(#logs, :empty_list), :new_log), "
-        "current_step = :step, #status = :status, updated_at = :ts"
+def set_callback_id(application_id, callback_id):
+    """Store callback_id on the META row so the API can resume the workflow."""
+    dynamodb_client.update_item(
+        TableName=os.environ["PROGRESS_TABLE"],
+        Key={"application_id": {"S": application_id}, "sk": {"S": META_SK}},
+        UpdateExpression="SET callback_id = :cid",
+        ExpressionAttributeValues={":cid": {"S": callback_id}},
     )
+
+
+def _batch_write(table_name, put_requests):
+    """BatchWriteItem in chunks, resending unprocessed items with exponential backoff."""
+    for start in range(0, len(put_requests), BATCH_WRITE_LIMIT):
+        pending = {table_name: put_requests[start:start + BATCH_WRITE_LIMIT]}
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(BATCH_WRITE_BASE_DELAY * 2 ** (attempt - 1))
+            pending = dynamodb_client.batch_write_item(RequestItems=pending).get("UnprocessedItems")
+            if not pending:
+                break
+        else:
+            raise RuntimeError(
+                f"{len(pending[table_name])} log entries still unprocessed "
+                f"after {BATCH_WRITE_MAX_ATTEMPTS} BatchWriteItem attempts"
+            )
+
+
+def _status_update(step, status, result, seq=None):
+    """Build the META UpdateExpression pieces; includes last_seq when seq is given."""
+    # No updated_at: the newest log entry's timestamp already records it
+    update_expr = "SET current_step = :step, #status = :status"
     expr_values = {
-        ":new_log": [log_entry],
-        ":empty_list": [],
-        ":step": step,
-        ":status": status,
-        ":ts": timestamp,
+        ":step": {"S": step},
+        ":status": {"S": status},
     }
     expr_names = {
-        "#logs": "logs",
         "#status": "status",
     }
 
+    if seq is not None:
+        update_expr += ", last_seq = :seq"
+        expr_values[":seq"] = seq
+
     if result is not None:
         update_expr += ", #result = :result"
-        expr_values[":result"] = _convert_floats(result)
+        expr_values[":result"] = _to_attribute_value(result)
         expr_names["#result"] = "result"
 
-    table.update_item(
-        Key={"application_id": application_id},
-        UpdateExpression=update_expr,
-        ExpressionAttributeValues=expr_values,
-        ExpressionAttributeNames=expr_names,
-    )
+    return update_expr, expr_values, expr_names
+
+
+def log_progress(application_id, log_entries, step, status, result=None, replayed_through=None, force=False):
+    """Update status on the application's META row and write log entry rows.
+
+    Every entry carries a monotonically increasing ``seq``. The META row
+    keeps the highest ``seq`` written so far as ``last_seq``, which never
+    moves backwards; entries at or below the value seen on the first flush
+    of an invocation were already logged by an earlier invocation and are
+    tagged as replays. Pass the previously returned value as
+    ``replayed_through`` on later flushes.
+
+    With ``force`` (terminal and error entries) the status is always
+    written, even when the batch's ``seq`` falls inside the replayed range.
+    Entries marked ``forced`` are never tagged as replays.
+
+    The first flush of an invocation is an UpdateItem (which reports the
+    stored ``last_seq``) followed by a BatchWriteItem; every later flush
+    is a single TransactWriteItems (or BatchWriteItem for pure replays).
+
+    Returns the ``last_seq`` replay threshold for this invocation.
+    """
+    table_name = os.environ["PROGRESS_TABLE"]
+    meta_key = {"application_id": {"S": application_id}, "sk": {"S": META_SK}}
+    batch_seq = {"N": str(log_entries[-1]["seq"])}
+
+    if replayed_through is not None and len(log_entries) < TRANSACT_WRITE_LIMIT:
+        put_requests = _log_put_requests(application_id, log_entries, replayed_through)
+
+        # A batch made up entirely of known replays leaves META untouched, so
+        # a replay never rolls status back to an earlier step
+        if log_entries[-1]["seq"] > replayed_through:
+            update_expr, expr_values, expr_names = _status_update(step, status, result, batch_seq)
+            condition = {"ConditionExpression": "attribute_not_exists(last_seq) OR last_seq < :seq"}
+        elif force:
+            update_expr, expr_values, expr_names = _status_update(step, status, result)
+            condition = {}
+        else:
+            _batch_write(table_name, put_requests)
+            return replayed_through
+
+        # Status and rows land together, so last_seq never covers unstored rows
+        dynamodb_client.transact_write_items(TransactItems=[
+            {"Update": {
+                "TableName": table_name,
+                "Key": meta_key,
+                "UpdateExpression": update_expr,
+                "ExpressionAttributeValues": expr_values,
+                "ExpressionAttributeNames": expr_names,
+                **condition,
+            }},
+            *({"Put": {"TableName": table_name, **request["PutRequest"]}} for request in put_requests),
+        ])
+        return replayed_through
+
+    advanced = False
+    if replayed_through is None or log_entries[-1]["seq"] > replayed_through:
+        update_expr, expr_values, expr_names = _status_update(step, status, result, batch_seq)
+        try:
+            response = dynamodb_client.update_item(
+                TableName=table_name,
+                Key=meta_key,
+                UpdateExpression=update_expr,
+                ConditionExpression="attribute_not_exists(last_seq) OR last_seq < :seq",
+                ExpressionAttributeValues=expr_values,
+                ExpressionAttributeNames=expr_names,
+                ReturnValues="UPDATED_OLD",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+            previous_seq = response.get("Attributes", {}).get("last_seq", {"N": "0"})
+            advanced = True
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            # An earlier invocation already logged past this whole batch
+            previous_seq = exc.response["Item"]["last_seq"]
+
+        # The first flush of an invocation learns how far earlier invocations got
+        if replayed_through is None:
+            replayed_through = int(previous_seq["N"])
+
+    if force and not advanced:
+        # Terminal status must reach the frontend even mid-replay; last_seq
+        # is left alone so it still never moves backwards
+        update_expr, expr_values, expr_names = _status_update(step, status, result)
+        dynamodb_client.update_item(
+            TableName=table_name,
+            Key=meta_key,
+            UpdateExpression=update_expr,
+            ExpressionAttributeValues=expr_values,
+            ExpressionAttributeNames=expr_names,
+        )
+
+    put_requests = _log_put_requests(application_id, log_entries, replayed_through)
+
+    try:
+        _batch_write(table_name, put_requests)
+    except Exception:
+        # Don't leave last_seq claiming rows that were never stored
+        if advanced:
+            try:
+                dynamodb_client.update_item(
+                    TableName=table_name,
+                    Key=meta_key,
+                    UpdateExpression="SET last_seq = :prev",
+                    ConditionExpression="last_seq = :seq",
+                    ExpressionAttributeValues={":prev": previous_seq, ":seq": batch_seq},
+                )
+            except ClientError as exc:
+                logger.warning("Could not roll back last_seq", error=str(exc))
+        raise
 
+    return replayed_through
 
-def _convert_floats(obj):
-    """Recursively convert float values to Decimal for DynamoDB."""
-    if isinstance(obj, float):
-        return Decimal(str(obj))
-    if isinstance(obj, dict):
-        return {k: _convert_floats(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_convert_floats(i) for i in obj]
-    return obj
+
+def _log_put_requests(application_id, log_entries, replayed_through):
+    """Marshal buffered entries into log rows, tagging replays on copies.
+
+    The buffered dicts are left untouched, so a flush that fails and is
+    retried does not tag the same entry twice.
+    """
+    expires_at = {"N": str(int(time.time()) + PROGRESS_TTL_DAYS * 86400)}
+    put_requests = []
+    for log_entry in log_entries:
+        row = {k: v for k, v in log_entry.items() if k != "forced"}
+        if log_entry["seq"] <= replayed_through and not log_entry.get("forced"):
+            row["message"] = f"[REPLAY] {row['message']}"
+            row["level"] = "replay"
+        item = {k: _to_attribute_value(v) for k, v in row.items()}
+        item["application_id"] = {"S": application_id}
+        item["sk"] = {"S": f"{LOG_SK_PREFIX}{row['timestamp']}#{uuid.uuid4().hex}"}
+        item["ttl"] = expires_at
+        put_requests.append({"PutRequest": {"Item": item}})
+    return put_requests
+
+
+class LogBuffer:
+    """Collect progress log entries in memory and write them in a single flush.
+
+    The workflow flushes at every step boundary (before each durable step
+    and each callback wait) and when the handler exits. The frontend still
+    sees each step start as it happens, while the end-of-step entry, the
+    next step's start entry and the status update share one write.
+    """
+
+    def __init__(self, application_id):
+        self.application_id = application_id
+        self._seq = itertools.count(1)
+        self._replayed_through = None
+        self._entries = []
+        self._step = None
+        self._status = None
+        self._result = None
+        self._force = False
+
+    def log(self, step, message, status, level="info", result=None, force=False):
+        """Buffer one entry; ``force`` marks terminal/error entries (see log_progress)."""
+        # Durable replay re-runs the handler deterministically, so the same
+        # log call gets the same seq on every invocation
+        self._entries.append({
+            "seq": next(self._seq),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "step": step,
+            "message": message,
+            "level": level,
+            "forced": force,
+        })
+        self._step = step
+        self._status = status
+        if result is not None:
+            self._result = result
+        self._force = self._force or force
+
+    def flush(self):
+        if not self._entries:
+            return
+        self._replayed_through = log_progress(
+            self.application_id, self._entries,
+            self._step, self._status, self._result, self._replayed_through,
+            force=self._force,
+        )
+        self._entries = []
+        self._result = None
+        self._force = False
 
 
 # ─────────────────────────────────────────────────
@@ -128,7 +371,8 @@ def validate_application(step_context: StepContext, application: dict) -> dict:
         "Validating application",
         extra={"application_id": application.get("application_id")},
     )
-    time.sleep(2)
+    if DEMO_MODE:
+        time.sleep(2)
 
     required = [
         "application_id", "applicant_name", "ssn_last4",
@@ -161,15 +405,12 @@ def validate_application(step_context: StepContext, application: dict) -> dict:
     }
 
 
-@durable_step
-def pull_credit_report(step_context: StepContext, bureau: str, ssn_last4: str) -> dict:
+def pull_credit_report(bureau: str, ssn_last4: str) -> dict:
     """Pull a credit report from one bureau."""
     logger.info(f"Pulling credit report from {bureau}")
-    time.sleep(3)
 
-    import random
-    seed = int(hashlib.md5(f"{bureau}-{ssn_last4}".encode()).hexdigest()[:8], 16)
-    rng = random.Random(seed)
+    # Stable across processes (unlike hash()), and no cryptographic digest needed
+    rng = random.Random(zlib.crc32(f"{bureau}-{ssn_last4}".encode()))
     score = rng.randint(580, 820)
 
     return {
@@ -182,11 +423,20 @@ def pull_credit_report(step_context: StepContext, bureau: str, ssn_last4: str) -
     }
 
 
+@durable_step
+def pull_all_credit_reports(step_context: StepContext, bureaus: list, ssn_last4: str) -> list:
+    """Pull credit reports from every bureau in a single checkpointed step."""
+    if DEMO_MODE:
+        time.sleep(3)
+    return [pull_credit_report(bureau, ssn_last4) for bureau in bureaus]
+
+
 @durable_step
 def calculate_risk_score(step_context: StepContext, credit_reports: list, ssn_last4: str, loan_amount: float) -> dict:
     """Aggregate credit reports and apply hardcoded scenario override."""
     logger.info("Calculating risk score from credit reports")
-    time.sleep(2)
+    if DEMO_MODE:
+        time.sleep(2)
 
     scores = [r["score"] for r in credit_reports]
     avg_score = sum(scores) / len(scores)
@@ -219,7 +469,8 @@ def calculate_risk_score(step_context: StepContext, credit_reports: list, ssn_la
 def generate_loan_offer(step_context: StepContext, app: dict, risk: dict) -> dict:
     """Generate the final loan offer with rate and payment terms."""
     logger.info(f"Generating offer for {app['application_id']}")
-    time.sleep(2)
+    if DEMO_MODE:
+        time.sleep(2)
 
     rate = risk["base_rate"]
     loan_amount = app["loan_amount"]
@@ -227,9 +478,8 @@ def generate_loan_offer(step_context: StepContext, app: dict, risk: dict) -> dic
     monthly_rate = rate / 100 / 12
 
     if monthly_rate > 0:
-        payment = loan_amount * (
-            monthly_rate * (1 + monthly_rate) ** term_months
-        ) / ((1 + monthly_rate) ** term_months - 1)
+        pow_term = (1.0 + monthly_rate) ** term_months
+        payment = loan_amount * monthly_rate * pow_term / (pow_term - 1.0)
     else:
         payment = loan_amount / term_months
 
@@ -259,12 +509,7 @@ def request_manager_approval(step_context: StepContext, callback_id: str, applic
     )
 
     # Write callback_id to DynamoDB so the API can read it when manager approves
-    table = get_progress_table()
-    table.update_item(
-        Key={"application_id": application_id},
-        UpdateExpression="SET callback_id = :cid",
-        ExpressionAttributeValues={":cid": callback_id},
-    )
+    set_callback_id(application_id, callback_id)
 
     return {
         "application_id": application_id,
@@ -275,25 +520,29 @@ def request_manager_approval(step_context: StepContext, callback_id: str, applic
 
 
 @durable_step
-def request_fraud_check(step_context: StepContext, callback_id: str, application_id: str, applicant_name: str) -> dict:
-    """Invoke the external fraud check Lambda, passing the callback_id so it can resume us."""
+def request_fraud_check(
+    step_context: StepContext,
+    callback_id: str,
+    application_id: str,
+    applicant_name: str,
+    correlation_id: str | None = None,
+) -> dict:
+    """Queue a request for the external fraud check Lambda, passing the callback_id so it can resume us."""
     logger.info(
         f"Requesting external fraud check for {applicant_name} "
         f"— callback_id: {callback_id}"
     )
 
-    lambda_client = boto3.client("lambda")
-    fraud_check_function = os.environ["FRAUD_CHECK_FUNCTION"]
+    fraud_check_queue_url = os.environ["FRAUD_CHECK_QUEUE_URL"]
 
-    import json
-    lambda_client.invoke(
-        FunctionName=fraud_check_function,
-        InvocationType="Event",
-        Payload=json.dumps({
+    sqs_client.send_message(
+        QueueUrl=fraud_check_queue_url,
+        MessageBody=orjson.dumps({
             "callback_id": callback_id,
             "application_id": application_id,
             "applicant_name": applicant_name,
-        }),
+            "correlation_id": correlation_id,
+        }).decode(),
     )
 
     return {
@@ -310,7 +559,8 @@ def disburse_funds(step_context: StepContext, offer: dict) -> dict:
     logger.info(
         f"Disbursing ${offer['loan_amount']:,.0f} for {offer['offer_id']}"
     )
-    time.sleep(2)
+    if DEMO_MODE:
+        time.sleep(2)
 
     return {
         "offer_id": offer["offer_id"],
@@ -331,28 +581,23 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
     Loan approval workflow with DynamoDB progress logging.
     Invoked asynchronously by the API Lambda.
     """
-    table = get_progress_table()
     application_id = event["application_id"]
-    logger.append_keys(application_id=application_id)
-
-    # Detect replay: count how many log entries exist per step in DynamoDB.
-    # On each invocation, track how many times we've logged each step.
-    # If we've already logged that many entries for a step, it's a replay.
-    from collections import Counter
-    existing = table.get_item(Key={"application_id": application_id}).get("Item", {})
-    prior_counts = Counter(entry["step"] for entry in existing.get("logs", []))
-    call_counts = Counter()
-
-    def log(step, message, status, level="info", result=None):
-        call_counts[step] += 1
-        if call_counts[step] <= prior_counts.get(step, 0):
-            message = f"[REPLAY] {message}"
-            level = "replay"
-        log_progress(table, application_id, step, message, status, level, result)
+    # Carry the API Gateway request ID (set by api.py) on every structured
+    # log line
+    logger.append_keys(
+        application_id=application_id,
+        correlation_id=event.get("_correlation_id"),
+    )
+
+    # Log entries already written by an earlier invocation are tagged
+    # [REPLAY] when flushed (see log_progress)
+    log_buffer = LogBuffer(application_id)
+    log = log_buffer.log
 
     try:
         # ── Step 1: Validate Application ────────────────────
-        log(  "validating", "Validating loan application...", "processing")
+        log("validating", "Validating loan application...", "processing")
+        log_buffer.flush()
         validated = context.step(validate_application(event))
 
         logger.info(
@@ -361,24 +606,23 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
         )
         log("validating", "Application validated successfully", "processing")
 
-        # ── Step 2: Parallel Credit Bureau Checks ───────────
+        # ── Step 2: Credit Bureau Checks ────────────────────
+        # The bureau lookups are local and CPU-only, so one step (one
+        # checkpoint) covers all three rather than a parallel branch each.
         log("credit_check", "Pulling credit reports from 3 bureaus...", "processing")
         bureaus = ["equifax", "transunion", "experian"]
 
-        credit_results = context.parallel([
-            lambda ctx, b=b: ctx.step(
-                pull_credit_report(b, validated["ssn_last4"])
-            )
-            for b in bureaus
-        ])
-
-        credit_reports = credit_results.get_results()
+        log_buffer.flush()
+        credit_reports = context.step(
+            pull_all_credit_reports(bureaus, validated["ssn_last4"])
+        )
         scores_str = ", ".join(f"{r['bureau']}={r['score']}" for r in credit_reports)
         logger.info(f"Credit reports pulled — scores: {scores_str}")
         log("credit_check", f"Credit scores received: {scores_str}", "processing")
 
         # ── Step 3: Risk Assessment ─────────────────────────
         log("risk_assessment", "Calculating risk score...", "processing")
+        log_buffer.flush()
         risk = context.step(calculate_risk_score(
             credit_reports, validated["ssn_last4"], validated["loan_amount"]
         ))
@@ -405,7 +649,7 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
             }
             log(
                 "risk_assessment", "Application denied",
-                "denied", level="warn", result=final_result,
+                "denied", level="warn", result=final_result, force=True,
             )
             return final_result
 
@@ -419,13 +663,9 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
 
             def submit_manager_approval(callback_id, _ctx):
                 """Store callback_id in DynamoDB so the frontend can send the approval."""
-                tbl = get_progress_table()
-                tbl.update_item(
-                    Key={"application_id": validated["application_id"]},
-                    UpdateExpression="SET callback_id = :cid",
-                    ExpressionAttributeValues={":cid": callback_id},
-                )
+                set_callback_id(validated["application_id"], callback_id)
 
+            log_buffer.flush()
             approval_result = context.wait_for_callback(
                 submit_manager_approval,
                 name="manager-approval",
@@ -433,7 +673,7 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
             )
 
             if isinstance(approval_result, str):
-                approval_result = json.loads(approval_result)
+                approval_result = orjson.loads(approval_result)
             logger.info(f"Manager approval result: {approval_result}")
 
             if not approval_result.get("approved"):
@@ -445,31 +685,32 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
                 }
                 log(
                     "manager_approval", "Application denied by manager",
-                    "denied", level="warn", result=final_result,
+                    "denied", level="warn", result=final_result, force=True,
                 )
                 return final_result
 
             log("manager_approval", "Manager approved the application", "processing")
 
         # ── Step 5: External Fraud Check (Callback) ─────────
-        # The workflow SUSPENDS here. An external Lambda (FraudCheckFunction)
-        # processes the request and calls SendDurableExecutionCallbackSuccess
-        # to resume this execution. Zero compute cost while waiting.
+        # The workflow SUSPENDS here. An external Lambda (FraudCheckFunction),
+        # subscribed to the fraud check SQS queue, processes the request and
+        # calls SendDurableExecutionCallbackSuccess to resume this execution.
+        # Zero compute cost while waiting.
         log("fraud_check", "Requesting external fraud check service...", "processing")
 
         def submit_fraud_check(callback_id, _ctx):
-            """Invoke the external fraud check Lambda, passing the callback_id."""
-            fraud_lambda = boto3.client("lambda")
-            fraud_lambda.invoke(
-                FunctionName=os.environ["FRAUD_CHECK_FUNCTION"],
-                InvocationType="Event",
-                Payload=json.dumps({
+            """Queue a request for the external fraud check Lambda, passing the callback_id."""
+            sqs_client.send_message(
+                QueueUrl=os.environ["FRAUD_CHECK_QUEUE_URL"],
+                MessageBody=orjson.dumps({
                     "callback_id": callback_id,
                     "application_id": validated["application_id"],
                     "applicant_name": validated["applicant_name"],
-                }),
+                    "correlation_id": event.get("_correlation_id"),
+                }).decode(),
             )
 
+        log_buffer.flush()
         fraud_result = context.wait_for_callback(
             submit_fraud_check,
             name="fraud-check",
@@ -477,7 +718,7 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
         )
 
         if isinstance(fraud_result, str):
-            fraud_result = json.loads(fraud_result)
+            fraud_result = orjson.loads(fraud_result)
         logger.info(f"Fraud check result: {fraud_result}")
         log(
             "fraud_check",
@@ -487,6 +728,7 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
 
         # ── Step 6: Generate Loan Offer ─────────────────────
         log("generating_offer", "Generating loan offer...", "processing")
+        log_buffer.flush()
         offer = context.step(generate_loan_offer(validated, risk))
 
         logger.info(
@@ -501,6 +743,7 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
 
         # ── Step 6: Disburse Funds ──────────────────────────
         log("disbursing", "Disbursing funds...", "processing")
+        log_buffer.flush()
         disbursement = context.step(disburse_funds(offer))
 
         logger.info(f"Funds disbursed: {disbursement['disbursement_ref']}")
@@ -518,7 +761,7 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
         }
         log(
             "complete", "Loan approved and funds disbursed!",
-            "approved", result=final_result,
+            "approved", result=final_result, force=True,
         )
         return final_result
 
@@ -526,6 +769,9 @@ def lambda_handler(event: dict, context: DurableContext) -> dict:
         logger.error(f"Loan workflow failed: {error}")
         log(
             "error", f"Workflow error: {str(error)}",
-            "failed", level="error",
+            "failed", level="error", force=True,
         )
         raise
+
+    finally:
+        log_buffer.flush()